@@ -1,16 +1,31 @@
-from flask import Flask, request, jsonify, session, redirect, url_for
+from flask import Flask, request, jsonify, session, redirect, url_for, g, has_request_context
 from flask_cors import CORS
+from flask_compress import Compress
+from flask_session import Session
+from flask.json.provider import DefaultJSONProvider
 import os
-from google import genai
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_search import YoutubeSearch
-import json
+import requests
+from requests.adapters import HTTPAdapter
+import orjson
+import redis
+import hashlib
 import logging
 import time
+import threading
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import select, update, delete, func, event, inspect, tuple_
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import joinedload, selectinload, raiseload
+from sqlalchemy.pool import NullPool
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from flask_login import LoginManager, UserMixin, login_user, logout_user, login_required, current_user
 from authlib.integrations.flask_client import OAuth
 from datetime import datetime
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
+from operator import itemgetter
 from dotenv import load_dotenv
 from werkzeug.middleware.proxy_fix import ProxyFix
 from pathlib import Path
@@ -23,9 +38,18 @@ load_dotenv(dotenv_path=env_path)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider backed by orjson, so jsonify(), request.json and
+    the session serializer all use the C encoder/decoder."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
-from flask_cors import CORS
-CORS(app, resources={r"/*": {"origins": "*"}})
+app.json = ORJSONProvider(app)
 # ProxyFix for Vercel deployment (trust proxy headers)
 app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
@@ -42,10 +66,17 @@ app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'    # Allow cookie in redirects
 
 if not is_production:
     os.environ['OAUTHLIB_INSECURE_TRANSPORT'] = '1'
-    print("⚠️  Running in DEVELOPMENT mode: Secure cookies disabled & Insecure Transport enabled.")
+    logger.warning("Running in DEVELOPMENT mode: Secure cookies disabled & Insecure Transport enabled.")
 
 CORS(app, supports_credentials=True) # Ensure credentials can be sent
 
+# Compress JSON bodies big enough to benefit (course detail, syllabi)
+app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+app.config['COMPRESS_MIN_SIZE'] = 500
+app.config['COMPRESS_LEVEL'] = 6
+app.config['COMPRESS_BR_LEVEL'] = 5
+Compress(app)
+
 # --- DATABASE CONFIGURATION ---
 # Get POSTGRES_URL from environment and fix the scheme if needed
 postgres_url = os.getenv("POSTGRES_URL")
@@ -61,9 +92,65 @@ else:
 
 app.config["SQLALCHEMY_DATABASE_URI"] = database_url
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {"pool_pre_ping": True}
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
+    "pool_pre_ping": True,
+    # db.JSON columns (quiz options, test cases, hints) go through orjson too
+    "json_serializer": lambda obj: orjson.dumps(obj).decode(),
+    "json_deserializer": orjson.loads
+}
+if database_url.startswith("postgresql"):
+    # Fail fast when the server is unreachable (e.g. on a cold start)
+    connect_args = {"connect_timeout": int(os.getenv("DB_CONNECT_TIMEOUT", "3"))}
+    # Opt-in: POSTGRES_URL is usually the provider's pooled (PgBouncer-style)
+    # endpoint, and poolers in transaction mode reject startup options, so only
+    # send statement_timeout when asked to, and never through an external pooler
+    statement_timeout_ms = os.getenv("DB_STATEMENT_TIMEOUT_MS")
+    if statement_timeout_ms and os.getenv("DB_EXTERNAL_POOLER") != "1":
+        connect_args["options"] = f"-c statement_timeout={int(statement_timeout_ms)}"
+    if os.getenv("DB_EXTERNAL_POOLER") == "1":
+        # PgBouncer / a provider's pooled endpoint already keeps server connections
+        # warm, so don't hold a second pool per function instance
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"]["poolclass"] = NullPool
+    else:
+        # Recycle before the server/proxy drops idle connections, and leave room for
+        # concurrent requests instead of queueing on the default pool of 5.
+        # Overridable per deployment (DB_POOL_RECYCLE plays the role of CONN_MAX_AGE).
+        # LIFO checkout reuses the most recently returned connection, so a few stay
+        # warm while the rest sit idle long enough to be recycled.
+        app.config["SQLALCHEMY_ENGINE_OPTIONS"].update(
+            pool_recycle=int(os.getenv("DB_POOL_RECYCLE", "300")),
+            pool_size=int(os.getenv("DB_POOL_SIZE", "10")),
+            max_overflow=int(os.getenv("DB_MAX_OVERFLOW", "20")),
+            pool_use_lifo=True
+        )
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"]["connect_args"] = connect_args
 db = SQLAlchemy(app)
 
+# --- QUERY OBSERVABILITY ---
+# Slow statements and requests that issue suspiciously many queries (a sign of
+# an N+1 creeping back in) are logged to stderr, where Vercel collects them
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "50"))
+QUERY_COUNT_WARN = int(os.getenv("QUERY_COUNT_WARN", "10"))
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    context._query_start = time.perf_counter()
+
+@event.listens_for(Engine, "after_cursor_execute")
+def log_slow_query(conn, cursor, statement, parameters, context, executemany):
+    elapsed_ms = (time.perf_counter() - context._query_start) * 1000
+    if elapsed_ms > SLOW_QUERY_MS:
+        logger.warning("Slow query (%.1f ms): %s", elapsed_ms, statement)
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+
+@app.after_request
+def log_query_count(response):
+    query_count = g.get('query_count', 0)
+    if query_count > QUERY_COUNT_WARN:
+        logger.warning("%s %s issued %d queries", request.method, request.path, query_count)
+    return response
+
 # --- MODELS ---
 class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -83,6 +170,12 @@ class UserProgress(db.Model):
     is_completed = db.Column(db.Boolean, default=False)  # Overall completion
     timestamp = db.Column(db.String(50), nullable=True)  # Last watched timestamp
     last_watched = db.Column(db.DateTime, default=datetime.utcnow)
+    __table_args__ = (
+        # One row per user/topic; also the conflict target of update_progress's upsert
+        db.Index('ix_up_user_topic', 'user_id', 'topic_id', unique=True),
+        # Covers the completed-topics lookups (topic_id included for index-only scans)
+        db.Index('ix_userprogress_user_completed', 'user_id', 'is_completed', 'topic_id'),
+    )
 
 
 # --- COURSE MODELS ---
@@ -93,50 +186,170 @@ class Course(db.Model):
     thumbnail_url = db.Column(db.String(200), nullable=True)
     is_generated = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    modules = db.relationship('Module', backref='course', lazy=True)
+    modules = db.relationship('Module', back_populates='course', lazy='select', order_by='Module.order_index')
 
 class Module(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     course_id = db.Column(db.String(100), db.ForeignKey('course.id'), nullable=False)
     title = db.Column(db.String(200), nullable=False)
     order_index = db.Column(db.Integer, nullable=False)
-    lessons = db.relationship('Lesson', backref='module', lazy=True)
+    course = db.relationship('Course', back_populates='modules')
+    lessons = db.relationship('Lesson', back_populates='module', lazy='select', order_by='Lesson.order_index')
+    __table_args__ = (db.Index('ix_module_course_order', 'course_id', 'order_index'),)
 
 class Lesson(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     module_id = db.Column(db.Integer, db.ForeignKey('module.id'), nullable=False)
-    title = db.Column(db.String(200), nullable=False)
+    title = db.Column(db.String(200), nullable=False, index=True)  # get_videos looks lessons up by title
     video_url = db.Column(db.String(200), nullable=False) # YouTube Video ID
     duration = db.Column(db.String(50), nullable=True) # e.g., "10:05"
     order_index = db.Column(db.Integer, nullable=False)
+    module = db.relationship('Module', back_populates='lessons')
+    quizzes = db.relationship('Quiz', back_populates='lesson', lazy='select')
+    practice_questions = db.relationship('PracticeQuestion', back_populates='lesson', lazy='select')
+    __table_args__ = (db.Index('ix_lesson_module_order', 'module_id', 'order_index'),)
 
 class Quiz(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    lesson_id = db.Column(db.Integer, db.ForeignKey('lesson.id'), nullable=False)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lesson.id'), nullable=False, index=True)
     question = db.Column(db.Text, nullable=False)
     options = db.Column(db.JSON, nullable=False)  # ["Option A", "Option B", "Option C", "Option D"]
     correct_answer = db.Column(db.String(100), nullable=False)
-    lesson = db.relationship('Lesson', backref=db.backref('quizzes', lazy=True))
+    lesson = db.relationship('Lesson', back_populates='quizzes')
 
 class PracticeQuestion(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    lesson_id = db.Column(db.Integer, db.ForeignKey('lesson.id'), nullable=False)
+    lesson_id = db.Column(db.Integer, db.ForeignKey('lesson.id'), nullable=False, index=True)
     problem_statement = db.Column(db.Text, nullable=False)
     test_cases = db.Column(db.JSON, nullable=True)  # [{"input": "...", "expected": "..."}]
     hints = db.Column(db.JSON, nullable=True)  # ["hint1", "hint2"]
-    lesson = db.relationship('Lesson', backref=db.backref('practice_questions', lazy=True))
+    lesson = db.relationship('Lesson', back_populates='practice_questions')
+
+def merge_duplicate_progress():
+    """Collapse duplicate (user_id, topic_id) progress rows, which the old
+    SELECT-then-INSERT update_progress could create under concurrent requests,
+    so the unique ix_up_user_topic index can be built. The lowest id (the row
+    that path kept updating) survives, marked complete if any duplicate was,
+    so /api/progress reports the same topics as before."""
+    key = (UserProgress.user_id, UserProgress.topic_id)
+    keep = select(func.min(UserProgress.id)).where(UserProgress.topic_id.isnot(None)).group_by(*key)
+    completed = select(*key).where(UserProgress.is_completed == True)
+    db.session.execute(
+        update(UserProgress)
+        .where(UserProgress.id.in_(keep), tuple_(*key).in_(completed))
+        .values(is_completed=True)
+    )
+    db.session.execute(
+        delete(UserProgress).where(UserProgress.topic_id.isnot(None), UserProgress.id.notin_(keep))
+    )
+    db.session.commit()
 
-# Initialize DB
-with app.app_context():
+def ensure_schema():
+    """Create missing tables, then missing indexes. create_all() skips tables
+    that already exist, so indexes added to an existing model would otherwise
+    never reach a database created before them."""
     db.create_all()
+    progress_indexes = {ix['name'] for ix in inspect(db.engine).get_indexes(UserProgress.__tablename__)}
+    if 'ix_up_user_topic' not in progress_indexes:
+        merge_duplicate_progress()
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(db.engine, checkfirst=True)
+
+@app.cli.command("db-init")
+def db_init_command():
+    """Create any missing tables and indexes."""
+    ensure_schema()
+    print("✅ Database tables and indexes created.")
+
+# Initialize DB. Schema creation is a deploy-time step (`flask --app api/index.py db-init`)
+# so cold starts don't pay for DDL introspection. It still runs on import for the
+# local SQLite fallback, so development works out of the box, and when
+# RUN_MIGRATIONS=1 for deploys that have no separate CLI step.
+if not postgres_url or os.getenv("RUN_MIGRATIONS") == "1":
+    with app.app_context():
+        ensure_schema()
+
+# --- CACHE CONFIGURATION ---
+# Optional shared cache (Redis). Lookups degrade to a miss and writes to a no-op
+# when REDIS_URL is unset or Redis is unreachable, so requests never fail on it.
+redis_url = os.getenv("REDIS_URL")
+redis_client = None
+if redis_url:
+    redis_client = redis.Redis.from_url(redis_url, socket_connect_timeout=0.5, socket_timeout=0.5)
+
+# Server-side sessions in Redis (opt-in): the cookie shrinks to a session id and
+# sessions can be revoked server-side. Unlike the cache below, this makes Redis
+# required for logged-in requests, hence the separate switch.
+if redis_client is not None and os.getenv("REDIS_SESSIONS") == "1":
+    app.config['SESSION_TYPE'] = 'redis'
+    app.config['SESSION_REDIS'] = redis_client
+    app.config['SESSION_PERMANENT'] = False
+    Session(app)
+
+SYLLABUS_CACHE_TTL = 24 * 60 * 60  # seconds
+YOUTUBE_CACHE_TTL = 24 * 60 * 60  # seconds
+# Course listing body; writers (the seed scripts) delete it, the TTL bounds staleness otherwise
+COURSES_CACHE_KEY = "courses:list"
+COURSES_CACHE_TTL = 60 * 60  # seconds
+
+def cache_get(key):
+    if redis_client is None:
+        return None
+    try:
+        return redis_client.get(key)
+    except redis.RedisError as e:
+        logger.warning("Redis GET %s failed: %s", key, e)
+        return None
+
+def cache_delete(key):
+    if redis_client is None:
+        return
+    try:
+        redis_client.delete(key)
+    except redis.RedisError as e:
+        logger.warning("Redis DEL %s failed: %s", key, e)
+
+def cache_set(key, value, ttl):
+    if redis_client is None:
+        return
+    try:
+        redis_client.setex(key, ttl, value)
+    except redis.RedisError as e:
+        logger.warning("Redis SET %s failed: %s", key, e)
 
 # --- AUTH CONFIGURATION ---
+# Registered before LoginManager so it runs after flask-login's remember-cookie
+# hook (after_request hooks run in reverse order). That hook reads the session
+# on every request, which makes Flask add `Vary: Cookie` and would keep the CDN
+# from sharing public responses; they don't depend on the session, so undo it.
+@app.after_request
+def keep_public_responses_shareable(response):
+    if response.cache_control.public and not session.modified:
+        session.accessed = False
+    return response
+
 login_manager = LoginManager()
 login_manager.init_app(app)
 
+USER_CACHE_TTL = 5 * 60  # seconds
+USER_CACHE_FIELDS = ('id', 'google_id', 'email', 'name', 'avatar')
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Runs on every authenticated request: serve the identity from Redis when
+    # possible instead of a SELECT each time
+    cached = cache_get(f"user:{user_id}")
+    if cached:
+        return User(**orjson.loads(cached))
+
+    user = db.session.get(User, int(user_id))
+    if user:
+        cache_user(user)
+    return user
+
+def cache_user(user):
+    cache_set(f"user:{user.id}", orjson.dumps({f: getattr(user, f) for f in USER_CACHE_FIELDS}), USER_CACHE_TTL)
 
 oauth = OAuth(app)
 google = oauth.register(
@@ -150,6 +363,8 @@ google = oauth.register(
     client_kwargs={'scope': 'openid email profile'},
     jwks_uri='https://www.googleapis.com/oauth2/v3/certs'
 )
+GOOGLE_JWKS_CACHE_KEY = "oauth:google:jwks"
+GOOGLE_JWKS_CACHE_TTL = 6 * 60 * 60  # seconds
 
 # --- MOCK DATA ---
 MOCK_SYLLABUS = {
@@ -182,14 +397,104 @@ MOCK_SYLLABUS = {
     ]
 }
 
+# Languages /api/syllabus will generate for, keyed by lowercase name
+SYLLABUS_LANGUAGES = {name.lower(): name for name in (
+    'Python', 'Java', 'JavaScript', 'TypeScript', 'C', 'C++', 'C#',
+    'Go', 'Rust', 'Ruby', 'Kotlin', 'Swift', 'PHP', 'SQL'
+)}
+
+# Smart Prompt for Syllabus (only {language} varies, so build it once)
+SYLLABUS_PROMPT = """
+    Create a structured learning syllabus for {language}.
+    Return ONLY valid JSON. Do not use Markdown blocks.
+    Structure:
+    {{
+        "title": "{language} Mastery",
+        "modules": [
+            {{
+                "title": "Module Title (e.g., Basics)",
+                "topics": [
+                    {{ "name": "Topic Name", "description": "Short explanation" }}
+                ]
+            }}
+        ]
+    }}
+    Include 3 modules: Basics, Intermediate, and Real-world Libraries.
+    """
+
 # 1. Setup Gemini (New Client)
 GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY")
-client = None
-if GEMINI_API_KEY:
-    try:
-        client = genai.Client(api_key=GEMINI_API_KEY)
-    except Exception as e:
-        logger.error(f"Failed to initialize Gemini client: {e}")
+GEMINI_TIMEOUT_MS = 20 * 1000
+_gemini_client = None
+_gemini_client_lock = threading.Lock()
+
+def get_gemini_client():
+    """Return the shared Gemini client, creating it on first use.
+
+    One instance serves every request so its HTTP connection pool (and TLS
+    sessions) are reused instead of rebuilt per call. The SDK is imported here
+    rather than at module top: it takes ~0.3s to import, and most cold starts
+    serve routes that never call Gemini.
+    """
+    global _gemini_client
+    if _gemini_client is not None or not GEMINI_API_KEY:
+        return _gemini_client
+    # Threaded servers could otherwise build (and import) the client twice
+    with _gemini_client_lock:
+        if _gemini_client is not None:
+            return _gemini_client
+        try:
+            import httpx
+            from google import genai
+            from google.genai import types as genai_types
+
+            _gemini_client = genai.Client(
+                api_key=GEMINI_API_KEY,
+                # Keep idle connections around between (infrequent) syllabus calls,
+                # and give up on a slow generation so the request can fall back
+                # to the mock syllabus instead of pinning a worker
+                http_options=genai_types.HttpOptions(
+                    timeout=GEMINI_TIMEOUT_MS,
+                    client_args={
+                        "limits": httpx.Limits(max_keepalive_connections=20, keepalive_expiry=120)
+                    }
+                )
+            )
+        except Exception as e:
+            logger.error("Failed to initialize Gemini client: %s", e)
+    return _gemini_client
+
+# 2. Setup YouTube search: one pooled session so every search after the first
+# reuses an open TCP/TLS connection to youtube.com
+# (the function is bundled from api/ on its own; keep the client version in
+# step with youtube_innertube.py, which the course factories share)
+YOUTUBE_SEARCH_URL = "https://www.youtube.com/youtubei/v1/search?prettyPrint=false"
+YOUTUBE_CLIENT_CONTEXT = {"client": {"clientName": "WEB", "clientVersion": "2.20240101.00.00", "hl": "en"}}
+youtube_session = requests.Session()
+youtube_session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=50))
+
+# Outside production, any relationship an ORM read path forgets to eager-load
+# raises instead of silently issuing one SELECT per row (N+1)
+LAZY_LOAD_GUARD = () if is_production else (raiseload('*', sql_only=True),)
+
+# --- RESPONSE HELPERS ---
+def orjsonify(data):
+    """jsonify() for hot read paths: orjson encodes straight to bytes in one C pass."""
+    return app.response_class(orjson.dumps(data), mimetype='application/json')
+
+def body_etag(body):
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+def with_etag(resp, etag=None):
+    """Tag a rarely-changing response so repeat clients revalidate with
+    If-None-Match and get an empty 304 instead of the full body. Pass a
+    precomputed etag for constant bodies."""
+    resp.set_etag(etag or body_etag(resp.get_data()))
+    return resp.make_conditional(request)
+
+# Fallback body (and its tag) is constant, so compute both once at import
+MOCK_SYLLABUS_JSON = orjson.dumps(MOCK_SYLLABUS)
+MOCK_SYLLABUS_ETAG = body_etag(MOCK_SYLLABUS_JSON)
 
 # --- AUTH ROUTES ---
 @app.route('/api/auth/login')
@@ -200,9 +505,31 @@ def login():
 @app.route('/api/auth/callback')
 def authorize():
     try:
+        # Google's signing keys are shared through Redis so a cold instance can
+        # verify the ID token without fetching them; authlib refetches on its
+        # own if Google has rotated to a key we don't have
+        if 'jwks' not in google.server_metadata:
+            cached_jwks = cache_get(GOOGLE_JWKS_CACHE_KEY)
+            if cached_jwks:
+                google.server_metadata['jwks'] = orjson.loads(cached_jwks)
+        jwks = google.server_metadata.get('jwks')
+
         token = google.authorize_access_token()
-        resp = google.get('userinfo')
-        user_info = resp.json()
+        if google.server_metadata.get('jwks') is not jwks:
+            cache_set(GOOGLE_JWKS_CACHE_KEY, orjson.dumps(google.server_metadata['jwks']), GOOGLE_JWKS_CACHE_TTL)
+
+        # The verified ID token already carries the profile claims; only fall
+        # back to the userinfo endpoint (an extra round-trip) without one
+        claims = token.get('userinfo')
+        if claims:
+            user_info = {
+                'id': claims['sub'],
+                'email': claims['email'],
+                'name': claims.get('name'),
+                'picture': claims.get('picture')
+            }
+        else:
+            user_info = google.get('userinfo').json()
         
         # Check if user exists
         user = User.query.filter_by(google_id=user_info['id']).first()
@@ -216,31 +543,57 @@ def authorize():
             db.session.add(user)
             db.session.commit()
         
+        cache_user(user)  # Write-through: the next request won't need a SELECT
         login_user(user)
+        session['user_payload'] = user_payload(user)
         # Redirect to frontend dashboard (relative path for mobile compatibility)
         return redirect('/dashboard')
     except Exception as e:
-        logger.error(f"Auth failed: {e}")
+        logger.error("Auth failed: %s", e)
         return jsonify({"error": str(e)}), 400
 
 @app.route('/api/auth/logout')
 #
 def logout():
     logout_user()
+    session.pop('user_payload', None)
     return jsonify({"message": "Logged out successfully"})
 
+def user_payload(user):
+    return {
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "avatar": user.avatar
+    }
+
 @app.route('/api/auth/me')
 def current_user_info():
+    # The SPA calls this on nearly every navigation. The payload lives in the
+    # signed session cookie, so a logged-in session is answered without
+    # loading the user at all
+    payload = session.get('user_payload')
+    if payload and session.get('_user_id') == str(payload['id']):
+        return orjsonify(payload)
+
     if current_user.is_authenticated:
-        return jsonify({
-            "id": current_user.id,
-            "name": current_user.name,
-            "email": current_user.email,
-            "avatar": current_user.avatar
-        })
+        payload = session['user_payload'] = user_payload(current_user)
+        return orjsonify(payload)
     return jsonify(None), 401
 
 # --- PROGRESS ROUTES ---
+@lru_cache(maxsize=1)
+def progress_upsert_supported():
+    """Whether the unique index update_progress's upsert targets exists. Checked
+    once per process; a negative answer means the deploy skipped db-init."""
+    supported = any(
+        ix['name'] == 'ix_up_user_topic' and ix['unique']
+        for ix in inspect(db.engine).get_indexes(UserProgress.__tablename__)
+    )
+    if not supported:
+        logger.warning("ix_up_user_topic is missing; run `flask db-init`. Using the slower progress update path.")
+    return supported
+
 @app.route('/api/progress/update', methods=['POST'])
 #
 def update_progress():
@@ -252,21 +605,44 @@ def update_progress():
     if not topic_id:
         return jsonify({"error": "Topic ID required"}), 400
 
-    progress = UserProgress.query.filter_by(user_id=current_user.id, topic_id=topic_id).first()
-    
-    if progress:
-        progress.is_completed = is_completed
-        progress.timestamp = timestamp
-        progress.last_watched = datetime.utcnow()
-    else:
-        progress = UserProgress(
-            user_id=current_user.id,
-            topic_id=topic_id,
-            is_completed=is_completed,
-            timestamp=timestamp
-        )
-        db.session.add(progress)
-    
+    if not progress_upsert_supported():
+        # Schema predates ix_up_user_topic (db-init not run yet): ON CONFLICT
+        # would have no constraint to target, so keep the SELECT-then-write path
+        progress = db.session.execute(
+            select(UserProgress).where(UserProgress.user_id == current_user.id, UserProgress.topic_id == topic_id).limit(1)
+        ).scalar()
+        if progress:
+            progress.is_completed = is_completed
+            progress.timestamp = timestamp
+            progress.last_watched = datetime.utcnow()
+        else:
+            db.session.add(UserProgress(
+                user_id=current_user.id,
+                topic_id=topic_id,
+                is_completed=is_completed,
+                timestamp=timestamp
+            ))
+        db.session.commit()
+        return jsonify({"message": "Progress updated"})
+
+    # Single INSERT ... ON CONFLICT DO UPDATE instead of SELECT then UPDATE/INSERT
+    insert = pg_insert if db.engine.dialect.name == 'postgresql' else sqlite_insert
+    stmt = insert(UserProgress).values(
+        user_id=current_user.id,
+        topic_id=topic_id,
+        is_completed=is_completed,
+        timestamp=timestamp,
+        last_watched=datetime.utcnow()
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'topic_id'],
+        set_={
+            'is_completed': stmt.excluded.is_completed,
+            'timestamp': stmt.excluded.timestamp,
+            'last_watched': stmt.excluded.last_watched
+        }
+    )
+    db.session.execute(stmt)
     db.session.commit()
     return jsonify({"message": "Progress updated"})
 
@@ -274,67 +650,88 @@ def update_progress():
 #
 def get_progress():
     # Return list of completed topic IDs
-    completed_progress = UserProgress.query.filter_by(user_id=current_user.id, is_completed=True).all()
-    completed_ids = [p.topic_id for p in completed_progress]
+    completed_ids = db.session.execute(
+        select(UserProgress.topic_id)
+        .where(UserProgress.user_id == current_user.id, UserProgress.is_completed == True)
+    ).scalars().all()
     return jsonify(completed_ids)
 
 
+@lru_cache(maxsize=512)
+def generate_syllabus(language):
+    """Ask Gemini for a syllabus. Successful results are memoized per language
+    (in-process, then in Redis for other workers); errors propagate and are
+    therefore never cached."""
+    cache_key = f"syllabus:{language.lower()}"
+    cached = cache_get(cache_key)
+    if cached:
+        return orjson.loads(cached)
+
+    prompt = SYLLABUS_PROMPT.format(language=language)
+
+    client = get_gemini_client()
+    if not client:
+         raise Exception("Gemini Client not initialized")
+
+    # New API Call Syntax with gemini-1.5-flash
+    response = client.models.generate_content(
+        model='gemini-1.5-flash', 
+        contents=prompt
+    )
+    
+    # Parse the outermost {...} span: drops ```json fences and any prose the
+    # model adds around the object without extra passes over the text
+    text = response.text
+    syllabus_data = orjson.loads(text[text.find('{'):text.rfind('}') + 1])
+    cache_set(cache_key, orjson.dumps(syllabus_data), SYLLABUS_CACHE_TTL)
+    return syllabus_data
+
 @app.route('/api/syllabus', methods=['GET'])
 def get_syllabus():
-    language = request.args.get('language', 'Python')
-    
-    # Smart Prompt for Syllabus
-    prompt = f"""
-    Create a structured learning syllabus for {language}.
-    Return ONLY valid JSON. Do not use Markdown blocks.
-    Structure:
-    {{
-        "title": "{language} Mastery",
-        "modules": [
-            {{
-                "title": "Module Title (e.g., Basics)",
-                "topics": [
-                    {{ "name": "Topic Name", "description": "Short explanation" }}
-                ]
-            }}
-        ]
-    }}
-    Include 3 modules: Basics, Intermediate, and Real-world Libraries.
-    """
+    # Only known languages reach Gemini: arbitrary input would burn quota and
+    # grow the syllabus caches without bound
+    language = SYLLABUS_LANGUAGES.get(request.args.get('language', 'Python').strip().lower())
+    if not language:
+        return jsonify({"error": "Unsupported language"}), 400
     
     try:
-        if not client:
-             raise Exception("Gemini Client not initialized")
-
-        # New API Call Syntax with gemini-1.5-flash
-        response = client.models.generate_content(
-            model='gemini-1.5-flash', 
-            contents=prompt
-        )
-        
-        # Clean response text
-        clean_text = response.text.replace('```json', '').replace('```', '').strip()
-        syllabus_data = json.loads(clean_text)
-        return jsonify(syllabus_data)
+        resp = with_etag(orjsonify(generate_syllabus(language)))
+        # Same content for every user, so let browsers and the CDN reuse it
+        # (Vercel's edge caches on s-maxage, browsers on max-age). The mock
+        # fallback below is deliberately not cached, so the next request retries
+        resp.cache_control.public = True
+        resp.cache_control.max_age = 3600
+        resp.cache_control.s_maxage = 3600
+        return resp
 
     except Exception as e:
-        logger.warning(f"⚠️ API Error: {e}. Serving Mock Data.")
+        logger.warning("API Error: %s. Serving Mock Data.", e)
         # Return Mock Data on ANY error (Rate Limit, Network, etc.)
-        return jsonify(MOCK_SYLLABUS)
+        return with_etag(app.response_class(MOCK_SYLLABUS_JSON, mimetype='application/json'), MOCK_SYLLABUS_ETAG)
 
 @app.route('/api/courses', methods=['GET'])
 def get_courses():
-    courses = Course.query.all()  # Fetch all courses from database
-    return jsonify([{
-        "id": c.id,
-        "title": c.title,
-        "description": c.description,
-        "thumbnail": c.thumbnail_url
-    } for c in courses])
+    # Only what the listing cards render, as plain rows: no ORM objects to
+    # hydrate, and the TEXT description stays in the DB (it is served by
+    # /api/courses/<id>)
+    body = cache_get(COURSES_CACHE_KEY)
+    if body is None:
+        courses = db.session.execute(
+            select(Course.id, Course.title, Course.thumbnail_url)
+        ).all()
+        body = orjson.dumps([{
+            "id": c.id,
+            "title": c.title,
+            "thumbnail": c.thumbnail_url
+        } for c in courses])
+        cache_set(COURSES_CACHE_KEY, body, COURSES_CACHE_TTL)
+    return with_etag(app.response_class(body, mimetype='application/json'))
 
 @app.route('/api/courses/<course_id>', methods=['GET'])
 def get_course_detail(course_id):
-    course = Course.query.get(course_id)
+    course = db.session.execute(
+        select(Course.title, Course.description).where(Course.id == course_id)
+    ).first()
     if not course:
         return jsonify({"error": "Course not found"}), 404
     
@@ -344,33 +741,48 @@ def get_course_detail(course_id):
         "modules": []
     }
     
-    # Sort modules by order_index
-    modules = sorted(course.modules, key=lambda x: x.order_index)
+    # The whole syllabus as flat, pre-sorted rows in a single query. Quiz/practice
+    # counts come from correlated COUNTs over the lesson_id indexes instead of
+    # loading every row per lesson.
+    quiz_count = select(func.count(Quiz.lesson_id)).where(Quiz.lesson_id == Lesson.id).scalar_subquery()
+    practice_count = select(func.count(PracticeQuestion.lesson_id)).where(PracticeQuestion.lesson_id == Lesson.id).scalar_subquery()
+    rows = db.session.execute(
+        select(Module.id, Module.title, Lesson.id, Lesson.title, Lesson.video_url, Lesson.duration, quiz_count, practice_count)
+        .outerjoin(Lesson, Lesson.module_id == Module.id)
+        .where(Module.course_id == course_id)
+        .order_by(Module.order_index, Module.id, Lesson.order_index)
+    ).all()
     
-    for module in modules:
-        lessons = sorted(module.lessons, key=lambda x: x.order_index)
+    for _, module_rows in groupby(rows, key=itemgetter(0)):
+        module_rows = list(module_rows)
         syllabus["modules"].append({
-            "title": module.title,
+            "title": module_rows[0][1],
             "topics": [{
-                "id": l.id,
-                "name": l.title,
-                "video_id": l.video_url,
-                "duration": l.duration,
-                "quiz_count": len(l.quizzes),
-                "practice_count": len(l.practice_questions)
-            } for l in lessons]
+                "id": r[2],
+                "name": r[3],
+                "video_id": r[4],
+                "duration": r[5],
+                "quiz_count": r[6],
+                "practice_count": r[7]
+            } for r in module_rows if r[2] is not None]  # Outer join: module without lessons
         })
         
-    return jsonify(syllabus)
+    return orjsonify(syllabus)
 
 @app.route('/api/lessons/<int:lesson_id>', methods=['GET'])
 def get_lesson_detail(lesson_id):
     """Get detailed lesson info including quizzes and practice questions"""
-    lesson = Lesson.query.get(lesson_id)
+    # Lesson + quizzes in one JOINed SELECT, practice questions in one IN query,
+    # rather than a lazy SELECT per relationship
+    lesson = db.session.get(Lesson, lesson_id, options=[
+        joinedload(Lesson.quizzes),
+        selectinload(Lesson.practice_questions),
+        *LAZY_LOAD_GUARD
+    ])
     if not lesson:
         return jsonify({"error": "Lesson not found"}), 404
     
-    return jsonify({
+    return orjsonify({
         "id": lesson.id,
         "title": lesson.title,
         "video_id": lesson.video_url,
@@ -392,20 +804,96 @@ def get_lesson_detail(lesson_id):
 @app.route('/api/courses/<course_id>/progress', methods=['GET'])
 #
 def get_course_progress(course_id):
-    # Get all lessons for this course
-    # This is a bit complex efficiently in SQL, but let's do it simply first
-    # We need to find which lessons the user has completed.
-    # UserProgress currently stores 'topic_id'. The plan mentioned maybe linking to Lesson.id.
-    # The existing UpdateProgress stores 'topic_id' which was a string. 
-    # For now, let's assume 'topic_id' in UserProgress will correspond to 'Lesson.title' OR we update the progress logic.
-    # The User Request says: "Returns which lessons the current user has completed (join with UserProgress)."
-    # Given the previous context, 'topic_id' was the lesson name. 
-    # Let's try to map it. 
-    
-    completed_progress = UserProgress.query.filter_by(user_id=current_user.id, is_completed=True).all()
-    completed_names = {p.topic_id for p in completed_progress} # Set of completed topic names/ids
-    
-    return jsonify(list(completed_names))
+    # Returns which lessons of this course the current user has completed.
+    # UserProgress.topic_id holds the lesson title, so join through Lesson and
+    # Module to keep the result (and the scan) scoped to the requested course.
+    completed_names = db.session.execute(
+        select(UserProgress.topic_id)
+        .join(Lesson, Lesson.title == UserProgress.topic_id)
+        .join(Module, Module.id == Lesson.module_id)
+        .where(
+            Module.course_id == course_id,
+            UserProgress.user_id == current_user.id,
+            UserProgress.is_completed == True
+        )
+        .distinct()
+    ).scalars().all()
+
+    return jsonify(completed_names)
+
+def _iter_video_renderers(node):
+    """Yield every videoRenderer in an InnerTube response, wherever it is nested."""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == 'videoRenderer':
+                yield value
+            else:
+                yield from _iter_video_renderers(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _iter_video_renderers(item)
+
+class NoVideosFound(Exception):
+    """A search that came back without videos (e.g. a consent page or a layout
+    change); raised so lru_cache doesn't memoize the empty result."""
+
+def search_youtube_videos(query, max_results=3):
+    """YouTube search results for a query. Topics repeat heavily across users,
+    so results are memoized (in-process, then in Redis for other workers); a
+    failed or empty search is not cached."""
+    try:
+        return _search_youtube_videos(query, max_results)
+    except NoVideosFound:
+        return []
+
+@lru_cache(maxsize=4096)
+def _search_youtube_videos(query, max_results):
+    cache_key = f"yt:{hashlib.blake2b(query.encode(), digest_size=8).hexdigest()}:{max_results}"
+    cached = cache_get(cache_key)
+    if cached:
+        return orjson.loads(cached)
+
+    resp = youtube_session.post(
+        YOUTUBE_SEARCH_URL,
+        json={"context": YOUTUBE_CLIENT_CONTEXT, "query": query},
+        timeout=10
+    )
+    resp.raise_for_status()
+
+    videos = []
+    for renderer in _iter_video_renderers(orjson.loads(resp.content)):
+        videos.append({
+            "id": renderer['videoId'],
+            "title": "".join(run['text'] for run in renderer['title'].get('runs', [])),
+            "thumbnails": [t['url'] for t in renderer['thumbnail']['thumbnails']]
+        })
+        if len(videos) == max_results:
+            break
+    if not videos:
+        raise NoVideosFound(query)
+    cache_set(cache_key, orjson.dumps(videos), YOUTUBE_CACHE_TTL)
+    return videos
+
+def tutorial_query(topic):
+    # YouTube search ignores case and extra whitespace, so normalizing here lets
+    # "Rust  Traits" and "rust traits" share one cache entry
+    return f"{' '.join(topic.lower().split())} tutorial"
+
+def lesson_video(lesson_title, video_url):
+    return {
+        "id": video_url,
+        "title": lesson_title,
+        "thumbnail": f"https://img.youtube.com/vi/{video_url}/mqdefault.jpg",
+        "score": 10
+    }
+
+def scored_search_results(results):
+    return [{
+        "id": v['id'],
+        "title": v['title'],
+        "thumbnail": v['thumbnails'][0],
+        "score": 5
+    } for v in results]
 
 @app.route('/api/videos', methods=['GET'])
 def get_videos():
@@ -413,33 +901,56 @@ def get_videos():
     if not topic:
         return jsonify({"error": "Topic required"}), 400
 
-    print(f"🔎 Searching for: {topic}")
+    logger.debug("Searching for: %s", topic)
     
     # Check if this topic exists as a lesson in our DB first (High Quality)
-    lesson = Lesson.query.filter_by(title=topic).first()
+    lesson = db.session.execute(
+        select(Lesson.title, Lesson.video_url).where(Lesson.title == topic).limit(1)
+    ).first()
     if lesson:
-         return jsonify([{
-            "id": lesson.video_url,
-            "title": lesson.title,
-            "thumbnail": f"https://img.youtube.com/vi/{lesson.video_url}/mqdefault.jpg",
-            "score": 10
-        }])
+         return orjsonify([lesson_video(lesson.title, lesson.video_url)])
 
     # Fallback: Search YouTube (Legacy Logic)
     try:
-        results = YoutubeSearch(f"{topic} tutorial", max_results=3).to_dict()
+        results = search_youtube_videos(tutorial_query(topic))
     except Exception as e:
         return jsonify({"error": f"YouTube search failed: {str(e)}"}), 500
     
-    # ... (rest of legacy logic could be here, or simplified)
-    scored_videos = [{
-            "id": v['id'],
-            "title": v['title'],
-            "thumbnail": v['thumbnails'][0],
-            "score": 5
-        } for v in results]
-    
-    return jsonify(scored_videos)
+    return orjsonify(scored_search_results(results))
+
+MAX_BATCH_TOPICS = 30
+# Shared by batch requests so concurrent searches reuse youtube_session's pool
+_search_pool = ThreadPoolExecutor(max_workers=10)
+
+@app.route('/api/videos/batch', methods=['GET'])
+def get_videos_batch():
+    """Videos for several topics at once (?topic=a&topic=b), e.g. to prefetch a
+    whole syllabus. DB lessons are resolved in one query and the remaining
+    YouTube searches run concurrently, so latency tracks the slowest search
+    rather than their sum. A topic whose search fails maps to []."""
+    # Blank topics are rejected like /api/videos does, not searched as " tutorial"
+    topics = list(dict.fromkeys(t for t in request.args.getlist('topic') if t.strip()))
+    if not topics:
+        return jsonify({"error": "Topic required"}), 400
+    if len(topics) > MAX_BATCH_TOPICS:
+        return jsonify({"error": f"At most {MAX_BATCH_TOPICS} topics per request"}), 400
+
+    videos = {}
+    for title, video_url in db.session.execute(
+        select(Lesson.title, Lesson.video_url).where(Lesson.title.in_(topics))
+    ):
+        videos.setdefault(title, [lesson_video(title, video_url)])
+
+    def search(topic):
+        try:
+            return scored_search_results(search_youtube_videos(tutorial_query(topic)))
+        except Exception as e:
+            logger.warning("YouTube search for %s failed: %s", topic, e)
+            return []
+
+    missing = [t for t in topics if t not in videos]
+    videos.update(zip(missing, _search_pool.map(search, missing)))
+    return orjsonify(videos)
 
 if __name__ == '__main__':
     app.run(port=3000, debug=True)
\ No newline at end of file
@@ -8,22 +8,23 @@ import sys
 import os
 from pathlib import Path
 
+from sqlalchemy import select, func
+
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from index import app, db, Course, Module, Lesson, Quiz, PracticeQuestion
+from index import app, db, Course, Module, Lesson, Quiz, PracticeQuestion, cache_delete, COURSES_CACHE_KEY, ensure_schema
 
 def clear_data():
-    """Clear existing data to avoid duplicates"""
-    with app.app_context():
-        print("🗑️  Clearing existing data...")
-        Quiz.query.delete()
-        PracticeQuestion.query.delete()
-        Lesson.query.delete()
-        Module.query.delete()
-        Course.query.delete()
-        db.session.commit()
-        print("✅ Data cleared!")
+    """Clear existing data to avoid duplicates. The deletes are left uncommitted
+    so they land in the same transaction as the new rows."""
+    ensure_schema()
+    print("🗑️  Clearing existing data...")
+    Quiz.query.delete()
+    PracticeQuestion.query.delete()
+    Lesson.query.delete()
+    Module.query.delete()
+    Course.query.delete()
 
 def seed_java_course():
     """Create Java Mastery course"""
@@ -39,7 +40,6 @@ def seed_java_course():
     # Module 1: Java Basics
     m1 = Module(course_id="java", title="Java Basics", order_index=1)
     db.session.add(m1)
-    db.session.flush()
     
     lessons_m1 = [
         ("Introduction to Java", "eIrMbAQSU34", "15:30"),
@@ -48,13 +48,12 @@ def seed_java_course():
     ]
     
     for idx, (title, video_id, duration) in enumerate(lessons_m1, 1):
-        lesson = Lesson(module_id=m1.id, title=title, video_url=video_id, duration=duration, order_index=idx)
+        lesson = Lesson(module=m1, title=title, video_url=video_id, duration=duration, order_index=idx)
         db.session.add(lesson)
-        db.session.flush()
         
         # Add quiz
         quiz = Quiz(
-            lesson_id=lesson.id,
+            lesson=lesson,
             question=f"What is the correct way to declare a {title.lower().split()[0]} in Java?",
             options=["int x = 5;", "x = 5 int;", "integer x = 5;", "var int x = 5;"],
             correct_answer="int x = 5;"
@@ -63,7 +62,7 @@ def seed_java_course():
         
         # Add practice question
         practice = PracticeQuestion(
-            lesson_id=lesson.id,
+            lesson=lesson,
             problem_statement=f"Write a Java program that demonstrates {title.lower()}.",
             test_cases=[
                 {"input": "5", "expected": "5"},
@@ -76,7 +75,6 @@ def seed_java_course():
     # Module 2: Object-Oriented Programming
     m2 = Module(course_id="java", title="Object-Oriented Programming", order_index=2)
     db.session.add(m2)
-    db.session.flush()
     
     lessons_m2 = [
         ("Classes and Objects", "IUqKuGNasdM", "20:15"),
@@ -86,12 +84,11 @@ def seed_java_course():
     ]
     
     for idx, (title, video_id, duration) in enumerate(lessons_m2, 1):
-        lesson = Lesson(module_id=m2.id, title=title, video_url=video_id, duration=duration, order_index=idx)
+        lesson = Lesson(module=m2, title=title, video_url=video_id, duration=duration, order_index=idx)
         db.session.add(lesson)
-        db.session.flush()
         
         quiz = Quiz(
-            lesson_id=lesson.id,
+            lesson=lesson,
             question=f"Which keyword is used for {title.lower()} in Java?",
             options=["extends", "implements", "inherits", "super"],
             correct_answer="extends" if "Inheritance" in title else "extends"
@@ -99,7 +96,7 @@ def seed_java_course():
         db.session.add(quiz)
         
         practice = PracticeQuestion(
-            lesson_id=lesson.id,
+            lesson=lesson,
             problem_statement=f"Create a class hierarchy demonstrating {title.lower()}.",
             test_cases=[{"input": "Animal", "expected": "Dog extends Animal"}],
             hints=["Use the extends keyword", "Override methods as needed"]
@@ -109,7 +106,6 @@ def seed_java_course():
     # Module 3: Collections Framework
     m3 = Module(course_id="java", title="Collections Framework", order_index=3)
     db.session.add(m3)
-    db.session.flush()
     
     lessons_m3 = [
         ("ArrayList and LinkedList", "1nRj4ALuw7A", "17:25"),
@@ -118,12 +114,11 @@ def seed_java_course():
     ]
     
     for idx, (title, video_id, duration) in enumerate(lessons_m3, 1):
-        lesson = Lesson(module_id=m3.id, title=title, video_url=video_id, duration=duration, order_index=idx)
+        lesson = Lesson(module=m3, title=title, video_url=video_id, duration=duration, order_index=idx)
         db.session.add(lesson)
-        db.session.flush()
         
         quiz = Quiz(
-            lesson_id=lesson.id,
+            lesson=lesson,
             question=f"What is the time complexity of adding an element to {title.split()[0]}?",
             options=["O(1)", "O(n)", "O(log n)", "O(n²)"],
             correct_answer="O(1)"
@@ -131,7 +126,7 @@ def seed_java_course():
         db.session.add(quiz)
         
         practice = PracticeQuestion(
-            lesson_id=lesson.id,
+            lesson=lesson,
             problem_statement=f"Implement a program using {title.split()[0]} to store and retrieve data.",
             test_cases=[{"input": "[1,2,3]", "expected": "3 elements"}],
             hints=["Import java.util.*", "Use add() method to insert elements"]
@@ -141,7 +136,6 @@ def seed_java_course():
     # Module 4: Advanced Java
     m4 = Module(course_id="java", title="Advanced Java", order_index=4)
     db.session.add(m4)
-    db.session.flush()
     
     lessons_m4 = [
         ("Exception Handling", "1XAfapkBQjk", "14:50"),
@@ -150,12 +144,11 @@ def seed_java_course():
     ]
     
     for idx, (title, video_id, duration) in enumerate(lessons_m4, 1):
-        lesson = Lesson(module_id=m4.id, title=title, video_url=video_id, duration=duration, order_index=idx)
+        lesson = Lesson(module=m4, title=title, video_url=video_id, duration=duration, order_index=idx)
         db.session.add(lesson)
-        db.session.flush()
         
         quiz = Quiz(
-            lesson_id=lesson.id,
+            lesson=lesson,
             question=f"Which class is commonly used for {title.lower()} in Java?",
             options=["Thread", "Exception", "File", "Stream"],
             correct_answer="Thread" if "Multithreading" in title else "Exception"
@@ -163,7 +156,7 @@ def seed_java_course():
         db.session.add(quiz)
         
         practice = PracticeQuestion(
-            lesson_id=lesson.id,
+            lesson=lesson,
             problem_statement=f"Write a program demonstrating {title.lower()} concepts.",
             test_cases=[{"input": "test.txt", "expected": "File processed"}],
             hints=["Use try-catch blocks", "Remember to close resources"]
@@ -184,7 +177,6 @@ def seed_c_course():
     # Module 1: C Basics
     m1 = Module(course_id="c", title="C Fundamentals", order_index=1)
     db.session.add(m1)
-    db.session.flush()
     
     lessons_m1 = [
         ("Hello World in C", "KJgsSFOSQv0", "8:30"),
@@ -194,12 +186,11 @@ def seed_c_course():
     ]
     
     for idx, (title, video_id, duration) in enumerate(lessons_m1, 1):
-        lesson = Lesson(module_id=m1.id, title=title, video_url=video_id, duration=duration, order_index=idx)
+        lesson = Lesson(module=m1, title=title, video_url=video_id, duration=duration, order_index=idx)
         db.session.add(lesson)
-        db.session.flush()
         
         quiz = Quiz(
-            lesson_id=lesson.id,
+            lesson=lesson,
             question=f"What is the correct syntax for {title.lower()} in C?",
             options=["printf()", "print()", "cout<<", "System.out"],
             correct_answer="printf()"
@@ -207,7 +198,7 @@ def seed_c_course():
         db.session.add(quiz)
         
         practice = PracticeQuestion(
-            lesson_id=lesson.id,
+            lesson=lesson,
             problem_statement=f"Write a C program that demonstrates {title.lower()}.",
             test_cases=[{"input": "5", "expected": "5"}],
             hints=["Include stdio.h", "Use printf for output"]
@@ -217,7 +208,6 @@ def seed_c_course():
     # Module 2: Pointers
     m2 = Module(course_id="c", title="Pointers and Memory", order_index=2)
     db.session.add(m2)
-    db.session.flush()
     
     lessons_m2 = [
         ("Introduction to Pointers", "zuegQmMdy8M", "20:00"),
@@ -227,12 +217,11 @@ def seed_c_course():
     ]
     
     for idx, (title, video_id, duration) in enumerate(lessons_m2, 1):
-        lesson = Lesson(module_id=m2.id, title=title, video_url=video_id, duration=duration, order_index=idx)
+        lesson = Lesson(module=m2, title=title, video_url=video_id, duration=duration, order_index=idx)
         db.session.add(lesson)
-        db.session.flush()
         
         quiz = Quiz(
-            lesson_id=lesson.id,
+            lesson=lesson,
             question="What does the * operator do in pointer context?",
             options=["Multiplication", "Dereference", "Address-of", "Division"],
             correct_answer="Dereference"
@@ -240,7 +229,7 @@ def seed_c_course():
         db.session.add(quiz)
         
         practice = PracticeQuestion(
-            lesson_id=lesson.id,
+            lesson=lesson,
             problem_statement=f"Implement {title.lower()} to swap two numbers.",
             test_cases=[{"input": "a=5, b=10", "expected": "a=10, b=5"}],
             hints=["Use & to get address", "Use * to dereference"]
@@ -250,7 +239,6 @@ def seed_c_course():
     # Module 3: File I/O
     m3 = Module(course_id="c", title="File Handling", order_index=3)
     db.session.add(m3)
-    db.session.flush()
     
     lessons_m3 = [
         ("File Operations", "BnYmbpVYx8k", "19:30"),
@@ -259,12 +247,11 @@ def seed_c_course():
     ]
     
     for idx, (title, video_id, duration) in enumerate(lessons_m3, 1):
-        lesson = Lesson(module_id=m3.id, title=title, video_url=video_id, duration=duration, order_index=idx)
+        lesson = Lesson(module=m3, title=title, video_url=video_id, duration=duration, order_index=idx)
         db.session.add(lesson)
-        db.session.flush()
         
         quiz = Quiz(
-            lesson_id=lesson.id,
+            lesson=lesson,
             question="Which function opens a file in C?",
             options=["fopen()", "open()", "file_open()", "openfile()"],
             correct_answer="fopen()"
@@ -272,7 +259,7 @@ def seed_c_course():
         db.session.add(quiz)
         
         practice = PracticeQuestion(
-            lesson_id=lesson.id,
+            lesson=lesson,
             problem_statement=f"Write a program for {title.lower()} in C.",
             test_cases=[{"input": "data.txt", "expected": "File processed successfully"}],
             hints=["Use fopen with mode 'r' or 'w'", "Always check if file opened successfully"]
@@ -293,7 +280,6 @@ def seed_cpp_course():
     # Module 1: C++ Basics
     m1 = Module(course_id="cpp", title="C++ Fundamentals", order_index=1)
     db.session.add(m1)
-    db.session.flush()
     
     lessons_m1 = [
         ("Introduction to C++", "vLnPwxZdW4Y", "12:00"),
@@ -302,12 +288,11 @@ def seed_cpp_course():
     ]
     
     for idx, (title, video_id, duration) in enumerate(lessons_m1, 1):
-        lesson = Lesson(module_id=m1.id, title=title, video_url=video_id, duration=duration, order_index=idx)
+        lesson = Lesson(module=m1, title=title, video_url=video_id, duration=duration, order_index=idx)
         db.session.add(lesson)
-        db.session.flush()
         
         quiz = Quiz(
-            lesson_id=lesson.id,
+            lesson=lesson,
             question="What is the correct way to output in C++?",
             options=["cout <<", "printf()", "print()", "System.out"],
             correct_answer="cout <<"
@@ -315,7 +300,7 @@ def seed_cpp_course():
         db.session.add(quiz)
         
         practice = PracticeQuestion(
-            lesson_id=lesson.id,
+            lesson=lesson,
             problem_statement=f"Write a C++ program demonstrating {title.lower()}.",
             test_cases=[{"input": "Hello", "expected": "Hello World"}],
             hints=["Include iostream", "Use std::cout or using namespace std"]
@@ -325,7 +310,6 @@ def seed_cpp_course():
     # Module 2: OOP in C++
     m2 = Module(course_id="cpp", title="Object-Oriented C++", order_index=2)
     db.session.add(m2)
-    db.session.flush()
     
     lessons_m2 = [
         ("Classes and Objects", "2BP8NhxjrO0", "18:45"),
@@ -335,12 +319,11 @@ def seed_cpp_course():
     ]
     
     for idx, (title, video_id, duration) in enumerate(lessons_m2, 1):
-        lesson = Lesson(module_id=m2.id, title=title, video_url=video_id, duration=duration, order_index=idx)
+        lesson = Lesson(module=m2, title=title, video_url=video_id, duration=duration, order_index=idx)
         db.session.add(lesson)
-        db.session.flush()
         
         quiz = Quiz(
-            lesson_id=lesson.id,
+            lesson=lesson,
             question=f"Which access specifier is default in C++ classes?",
             options=["private", "public", "protected", "internal"],
             correct_answer="private"
@@ -348,7 +331,7 @@ def seed_cpp_course():
         db.session.add(quiz)
         
         practice = PracticeQuestion(
-            lesson_id=lesson.id,
+            lesson=lesson,
             problem_statement=f"Implement a class demonstrating {title.lower()}.",
             test_cases=[{"input": "Object", "expected": "Constructor called"}],
             hints=["Use class keyword", "Define constructor with same name as class"]
@@ -358,7 +341,6 @@ def seed_cpp_course():
     # Module 3: STL
     m3 = Module(course_id="cpp", title="Standard Template Library", order_index=3)
     db.session.add(m3)
-    db.session.flush()
     
     lessons_m3 = [
         ("Vectors", "SGyutdso6_c", "17:00"),
@@ -367,12 +349,11 @@ def seed_cpp_course():
     ]
     
     for idx, (title, video_id, duration) in enumerate(lessons_m3, 1):
-        lesson = Lesson(module_id=m3.id, title=title, video_url=video_id, duration=duration, order_index=idx)
+        lesson = Lesson(module=m3, title=title, video_url=video_id, duration=duration, order_index=idx)
         db.session.add(lesson)
-        db.session.flush()
         
         quiz = Quiz(
-            lesson_id=lesson.id,
+            lesson=lesson,
             question=f"Which header is needed for {title.lower()} in C++?",
             options=["<vector>", "<algorithm>", "<map>", "<set>"],
             correct_answer="<vector>" if "Vector" in title else "<algorithm>"
@@ -380,7 +361,7 @@ def seed_cpp_course():
         db.session.add(quiz)
         
         practice = PracticeQuestion(
-            lesson_id=lesson.id,
+            lesson=lesson,
             problem_statement=f"Solve a problem using STL {title.lower()}.",
             test_cases=[{"input": "[3,1,2]", "expected": "[1,2,3]"}],
             hints=["Include the appropriate STL header", "Use iterators for traversal"]
@@ -390,7 +371,6 @@ def seed_cpp_course():
     # Module 4: Templates
     m4 = Module(course_id="cpp", title="Templates", order_index=4)
     db.session.add(m4)
-    db.session.flush()
     
     lessons_m4 = [
         ("Function Templates", "I-hZkUa9mIs", "14:30"),
@@ -399,12 +379,11 @@ def seed_cpp_course():
     ]
     
     for idx, (title, video_id, duration) in enumerate(lessons_m4, 1):
-        lesson = Lesson(module_id=m4.id, title=title, video_url=video_id, duration=duration, order_index=idx)
+        lesson = Lesson(module=m4, title=title, video_url=video_id, duration=duration, order_index=idx)
         db.session.add(lesson)
-        db.session.flush()
         
         quiz = Quiz(
-            lesson_id=lesson.id,
+            lesson=lesson,
             question="What keyword declares a template in C++?",
             options=["template", "generic", "typename", "class"],
             correct_answer="template"
@@ -412,7 +391,7 @@ def seed_cpp_course():
         db.session.add(quiz)
         
         practice = PracticeQuestion(
-            lesson_id=lesson.id,
+            lesson=lesson,
             problem_statement=f"Create a {title.lower()} that works with multiple data types.",
             test_cases=[{"input": "int, double", "expected": "Both types work"}],
             hints=["Use template<typename T>", "Templates are defined in header files"]
@@ -422,7 +401,6 @@ def seed_cpp_course():
     # Module 5: Modern C++
     m5 = Module(course_id="cpp", title="Modern C++ (C++11/14/17)", order_index=5)
     db.session.add(m5)
-    db.session.flush()
     
     lessons_m5 = [
         ("Auto and Decltype", "2vOPEuiGXVo", "12:15"),
@@ -432,12 +410,11 @@ def seed_cpp_course():
     ]
     
     for idx, (title, video_id, duration) in enumerate(lessons_m5, 1):
-        lesson = Lesson(module_id=m5.id, title=title, video_url=video_id, duration=duration, order_index=idx)
+        lesson = Lesson(module=m5, title=title, video_url=video_id, duration=duration, order_index=idx)
         db.session.add(lesson)
-        db.session.flush()
         
         quiz = Quiz(
-            lesson_id=lesson.id,
+            lesson=lesson,
             question=f"Which C++ version introduced {title.lower()}?",
             options=["C++11", "C++14", "C++17", "C++20"],
             correct_answer="C++11"
@@ -445,7 +422,7 @@ def seed_cpp_course():
         db.session.add(quiz)
         
         practice = PracticeQuestion(
-            lesson_id=lesson.id,
+            lesson=lesson,
             problem_statement=f"Demonstrate the use of {title.lower()} in a practical example.",
             test_cases=[{"input": "test", "expected": "Modern feature working"}],
             hints=["Compile with -std=c++11 or higher", "Check compiler support"]
@@ -456,9 +433,9 @@ def main():
     print("🚀 VisionFlow Database Seeder")
     print("=" * 40)
     
-    clear_data()
-    
     with app.app_context():
+        clear_data()
+
         print("\n📚 Seeding Java Mastery course...")
         seed_java_course()
         print("✅ Java course added!")
@@ -471,14 +448,19 @@ def main():
         seed_cpp_course()
         print("✅ C++ course added!")
         
+        # Rows are linked through relationships rather than flushed ids, so this
+        # one flush inserts each table in a single batched statement. The deletes
+        # from clear_data() share the transaction: one commit, and readers never
+        # see an empty catalog mid-reseed
         db.session.commit()
+        cache_delete(COURSES_CACHE_KEY)
         
         # Print summary
-        courses = Course.query.count()
-        modules = Module.query.count()
-        lessons = Lesson.query.count()
-        quizzes = Quiz.query.count()
-        practices = PracticeQuestion.query.count()
+        # All five counts in one round-trip
+        courses, modules, lessons, quizzes, practices = db.session.execute(select(*(
+            select(func.count()).select_from(model).scalar_subquery()
+            for model in (Course, Module, Lesson, Quiz, PracticeQuestion)
+        ))).one()
         
         print("\n" + "=" * 40)
         print("📊 SEEDING COMPLETE!")
@@ -1,58 +1,26 @@
 import os
-import json
+import orjson
 import time
 import requests
+from requests.adapters import HTTPAdapter
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 import google.generativeai as genai
-from youtubesearchpython import VideosSearch
 import psycopg2
+from psycopg2.extras import execute_values
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 from rich import print as rprint
-
-# --- FIX: MONKEY PATCH FOR YOUTUBE PROXIES BUG ---
-# This forces the requests library to ignore the 'proxies' argument that causes the crash
-original_post = requests.post
-def patched_post(*args, **kwargs):
-    kwargs.pop('proxies', None)
-    return original_post(*args, **kwargs)
-requests.post = patched_post
-# ---------------------------------------------------
+from youtube_innertube import YOUTUBE_SEARCH_URL, search_body, iter_video_renderers
+from shelve_cache import ShelveCache
+from roadmap import validate_roadmap
 
 load_dotenv()
 console = Console()
 
-class CourseGenerator:
-    """Generates structured courses with validated video content."""
-
-    def __init__(self, api_key: str):
-        """Initialize with auto-fallback for model names."""
-        if not api_key:
-            rprint("[bold red]❌ Error: GEMINI_API_KEY is missing from .env[/bold red]")
-            exit(1)
-            
-        genai.configure(api_key=api_key)
-        
-        # Try Flash first (Fast), fallback to Pro (Stable)
-        try:
-            self.model = genai.GenerativeModel('gemini-1.5-flash-latest')
-            # Test connection
-            self.model.generate_content("test")
-            self.model_name = "Gemini 1.5 Flash"
-        except Exception:
-            try:
-                self.model = genai.GenerativeModel('gemini-pro')
-                self.model_name = "Gemini Pro"
-            except Exception as e:
-                rprint(f"[bold red]❌ Critical Error: Could not connect to any Gemini model.[/bold red]")
-                rprint(f"Details: {e}")
-                exit(1)
-
-        rprint(f"[green]✔ Connected to AI Model: {self.model_name}[/green]")
-
-    def generate_roadmap(self, topic: str):
-        """Generates the course syllabus."""
-        system_prompt = f"""
+# Prompt templates are constant apart from the topic, so build them once
+ROADMAP_PROMPT = """
         Act as an expert instructor. Create a complete, structured course roadmap for learning '{topic}'.
         
         Strict Output Format (JSON ONLY):
@@ -70,33 +38,107 @@ class CourseGenerator:
         }}
         Do NOT use Markdown formatting (no ```json). Just raw JSON.
         """
+
+KEYWORDS_PROMPT = """
+        Act as a syllabus analyst. Convert the topic '{subtopic}' into 5-10 single-word learning indicators.
+        Output ONLY comma-separated words. No explanation.
+        Example: "Variables" -> variable, storage, value, declare, assign, type
+        """
+
+# Gemini answers are cached on disk by prompt, so re-running the generator for a
+# topic it has already seen costs no quota and no model latency
+GEMINI_CACHE_PATH = os.getenv("GEMINI_CACHE_PATH", ".gemini_cache")
+gemini_cache = ShelveCache(GEMINI_CACHE_PATH)
+
+youtube_session = requests.Session()
+# Sized for upload_to_db's 12 search threads, so no connection is discarded
+youtube_session.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=20))
+
+class CourseGenerator:
+    """Generates structured courses with validated video content."""
+
+    def __init__(self, api_key: str):
+        """Initialize with auto-fallback for model names."""
+        if not api_key:
+            rprint("[bold red]❌ Error: GEMINI_API_KEY is missing from .env[/bold red]")
+            exit(1)
+            
+        genai.configure(api_key=api_key)
+        
+        # Flash first (Fast); generate() falls back to Pro (Stable) if it fails.
+        # Constructing a model makes no request, so startup costs no LLM call.
+        self.model = genai.GenerativeModel('gemini-1.5-flash-latest')
+        self.model_name = "Gemini 1.5 Flash"
+        self.can_fall_back = True
+
+        rprint(f"[green]✔ Using AI Model: {self.model_name}[/green]")
+
+    def generate(self, prompt: str):
+        """Runs the prompt, switching to Gemini Pro for good if Flash fails."""
+        try:
+            return self.model.generate_content(prompt)
+        except Exception as e:
+            if not self.can_fall_back:
+                raise
+            self.can_fall_back = False
+            rprint(f"[yellow]⚠ {self.model_name} failed ({e}), falling back to Gemini Pro[/yellow]")
+            self.model = genai.GenerativeModel('gemini-pro')
+            self.model_name = "Gemini Pro"
+            return self.model.generate_content(prompt)
+
+    def generate_roadmap(self, topic: str):
+        """Generates the course syllabus."""
+        system_prompt = ROADMAP_PROMPT.format(topic=topic)
+        cached = gemini_cache.get(system_prompt)
+        if cached:
+            return cached
         
         try:
-            response = self.model.generate_content(system_prompt)
-            clean_text = response.text.replace("```json", "").replace("```", "").strip()
-            return json.loads(clean_text)
+            response = self.generate(system_prompt)
+            # Parse the outermost {...} span: drops ```json fences and any prose
+            # around the object in one slice instead of scanning with replace()
+            text = response.text
+            roadmap = validate_roadmap(orjson.loads(text[text.find('{'):text.rfind('}') + 1]))
+            gemini_cache.set(system_prompt, roadmap)
+            return roadmap
         except Exception as e:
             rprint(f"[red]Error generating roadmap: {e}[/red]")
             return None
 
     def get_keywords(self, subtopic: str):
         """Extracts validation keywords."""
-        prompt = f"""
-        Act as a syllabus analyst. Convert the topic '{subtopic}' into 5-10 single-word learning indicators.
-        Output ONLY comma-separated words. No explanation.
-        Example: "Variables" -> variable, storage, value, declare, assign, type
-        """
+        prompt = KEYWORDS_PROMPT.format(subtopic=subtopic)
+        cached = gemini_cache.get(prompt)
+        if cached:
+            return cached
         try:
-            response = self.model.generate_content(prompt)
-            return [w.strip() for w in response.text.split(',')]
+            response = self.generate(prompt)
+            keywords = [w.strip() for w in response.text.split(',')]
+            gemini_cache.set(prompt, keywords)
+            return keywords
         except:
             return []
 
     def find_videos(self, query: str, limit=3):
-        """Finds videos using the fixed library."""
+        """Finds videos via YouTube's InnerTube search API."""
         try:
-            search = VideosSearch(query, limit=limit)
-            return search.result().get('result', [])
+            resp = youtube_session.post(
+                YOUTUBE_SEARCH_URL,
+                json=search_body(query),
+                timeout=10
+            )
+            resp.raise_for_status()
+
+            videos = []
+            for renderer in iter_video_renderers(orjson.loads(resp.content)):
+                videos.append({
+                    'link': f"https://www.youtube.com/watch?v={renderer['videoId']}",
+                    'duration': renderer.get('lengthText', {}).get('simpleText', ''),
+                    'thumbnails': renderer['thumbnail']['thumbnails']
+                })
+                if len(videos) == limit:
+                    break
+            return videos
         except Exception as e:
             rprint(f"[yellow]⚠ Video search warning: {e}[/yellow]")
             return []
@@ -127,6 +169,19 @@ class CourseGenerator:
             rprint("[red]❌ Error: POSTGRES_URL missing from .env[/red]")
             return
 
+        # Search videos for every subtopic up front; the lookups are pure network
+        # I/O, so running them concurrently costs max(latency) instead of sum(latency).
+        subtopics = list(dict.fromkeys(
+            subtopic
+            for level in course_data['levels']
+            for topic in level['topics']
+            for subtopic in topic['subtopics']
+        ))
+        rprint(f"[cyan]Searching videos for {len(subtopics)} lessons...[/cyan]")
+        with ThreadPoolExecutor(max_workers=12) as executor:
+            found_videos = executor.map(lambda s: self.find_videos(f"{s} tutorial", limit=1), subtopics)
+            videos_by_subtopic = dict(zip(subtopics, found_videos))
+
         try:
             conn = psycopg2.connect(conn_string)
             cur = conn.cursor()
@@ -144,32 +199,32 @@ class CourseGenerator:
             # For now, we will print them. (You can add logic to save them to a 'Resource' table later)
             
             # 3. Upload Syllabus
-            total_topics = 0
+            # Module ids are generated here so lessons can reference them without a
+            # RETURNING round-trip per module; each table then goes in one statement.
+            module_rows = []
+            lesson_rows = []
             for level in course_data['levels']:
                 rprint(f"  📂 Processing Level: {level['level_name']}")
                 for topic in level['topics']:
-                    # Create Module
-                    cur.execute("""
-                        INSERT INTO "Module" (id, "courseId", title, "createdAt", "updatedAt")
-                        VALUES (gen_random_uuid(), %s, %s, NOW(), NOW())
-                        RETURNING id;
-                    """, (course_id, topic['title']))
-                    module_id = cur.fetchone()[0]
-
-                    # Create Lessons (Subtopics)
+                    module_id = str(uuid.uuid4())
+                    module_rows.append((module_id, course_id, topic['title']))
+
+                    # Lessons (Subtopics)
                     for subtopic in topic['subtopics']:
-                        # Find Video
-                        videos = self.find_videos(f"{subtopic} tutorial", limit=1)
+                        videos = videos_by_subtopic[subtopic]
                         video_url = videos[0]['link'] if videos else "[https://youtube.com](https://youtube.com)"
                         duration = videos[0]['duration'] if videos else "10:00"
                         thumb = videos[0]['thumbnails'][0]['url'] if videos else ""
+                        lesson_rows.append((module_id, subtopic, video_url, duration, thumb))
+
+            execute_values(cur, """
+                INSERT INTO "Module" (id, "courseId", title, "createdAt", "updatedAt") VALUES %s
+            """, module_rows, template="(%s, %s, %s, NOW(), NOW())", page_size=500)
+            execute_values(cur, """
+                INSERT INTO "Lesson" (id, "moduleId", title, "videoUrl", duration, "thumbnailUrl", "createdAt", "updatedAt") VALUES %s
+            """, lesson_rows, template="(gen_random_uuid(), %s, %s, %s, %s, %s, NOW(), NOW())", page_size=500)
+            total_topics = len(lesson_rows)
 
-                        cur.execute("""
-                            INSERT INTO "Lesson" (id, "moduleId", title, "videoUrl", duration, "thumbnailUrl", "createdAt", "updatedAt")
-                            VALUES (gen_random_uuid(), %s, %s, %s, %s, %s, NOW(), NOW());
-                        """, (module_id, subtopic, video_url, duration, thumb))
-                        total_topics += 1
-                        
             conn.commit()
             cur.close()
             conn.close()
@@ -186,14 +241,18 @@ def main():
     if not topic:
         return
 
-    # 1. Find Crash Courses
-    crash_courses = generator.find_crash_courses(topic)
+    # 1. Find Crash Courses in the background: it only needs the topic, so the
+    # YouTube search overlaps with the (much slower) roadmap generation
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        crash_courses_future = executor.submit(generator.find_crash_courses, topic)
+
+        # 2. Generate Roadmap
+        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
+            task = progress.add_task(f"[cyan]Generating Roadmap for {topic}...", total=None)
+            roadmap = generator.generate_roadmap(topic)
+
+        crash_courses = crash_courses_future.result()
 
-    # 2. Generate Roadmap
-    with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}")) as progress:
-        task = progress.add_task(f"[cyan]Generating Roadmap for {topic}...", total=None)
-        roadmap = generator.generate_roadmap(topic)
-        
     if roadmap:
         rprint("\n[bold]🗺️  Roadmap Generated![/bold]")
         # 3. Upload
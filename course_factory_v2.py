@@ -1,17 +1,92 @@
 import os
-import json
+import orjson
 import time
+import threading
 import requests
-import re
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+import uuid
 from dotenv import load_dotenv
 import psycopg2
+from psycopg2.extras import execute_values
 from rich.console import Console
+from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, MofNCompleteColumn
 from rich import print as rprint
+from youtube_innertube import YOUTUBE_SEARCH_URL, search_body, iter_video_renderers
+from shelve_cache import ShelveCache
+from roadmap import validate_roadmap
 
 # 1. LOAD SECRETS FIRST
 load_dotenv()
 console = Console()
 
+# The roadmap prompt only varies by topic, so keep the template at module level
+ROADMAP_PROMPT = """
+        Act as an expert instructor. Create a JSON course roadmap for '{topic}'.
+        Strict JSON format.
+        Structure:
+        {{
+            "title": "{topic} Mastery",
+            "description": "Complete guide from beginner to expert.",
+            "levels": [
+                {{
+                    "level_name": "Beginner",
+                    "topics": [
+                        {{ "title": "Topic Name", "subtopics": ["Subtopic 1", "Subtopic 2"] }}
+                    ]
+                }}
+            ]
+        }}
+        """
+
+# Searches run concurrently but are paced (and back off on 429s), so YouTube
+# doesn't throttle us
+YOUTUBE_SEARCHES_PER_SECOND = 5
+YOUTUBE_SEARCH_WORKERS = 6
+YOUTUBE_SEARCH_ATTEMPTS = 5  # per query, when YouTube answers 429 or 5xx
+
+# Roadmaps and search results are cached on disk, so re-running a topic (or
+# overlapping subtopics) skips the Groq call and the YouTube requests
+FACTORY_CACHE_PATH = os.getenv("FACTORY_CACHE_PATH", ".factory_cache")
+factory_cache = ShelveCache(FACTORY_CACHE_PATH)
+
+class RateLimiter:
+    """Spaces calls at least `interval` apart, across threads. A rate-limit
+    response doubles the interval; each success then takes one base step off
+    it, so the rate recovers gradually (additive increase, multiplicative
+    decrease) and we only slow down when the server asks us to."""
+
+    def __init__(self, per_second, max_interval=10.0):
+        self.base_interval = self.interval = 1 / per_second
+        self.max_interval = max_interval
+        self.lock = threading.Lock()
+        self.next_slot = time.monotonic()
+        self.last_slow_down = float('-inf')
+
+    def wait(self):
+        """Block until the caller's slot; returns the slot's start time."""
+        with self.lock:
+            now = time.monotonic()
+            slot = max(self.next_slot, now)
+            self.next_slot = slot + self.interval
+        time.sleep(slot - now)
+        return slot
+
+    def slow_down(self, sent_at):
+        with self.lock:
+            # Only back off once per burst: a 429 for a request that was already
+            # in flight when we last slowed down says nothing new, so concurrent
+            # workers don't compound the interval straight to the cap
+            if sent_at >= self.last_slow_down:
+                self.interval = min(self.interval * 2, self.max_interval)
+                self.last_slow_down = time.monotonic()
+            self.next_slot = max(self.next_slot, time.monotonic() + self.interval)
+
+    def recover(self):
+        with self.lock:
+            self.interval = max(self.interval - self.base_interval, self.base_interval)
+
 class DirectCourseFactory:
     """A robust factory using Groq (Fast & Free) to generate courses."""
 
@@ -29,6 +104,17 @@ class DirectCourseFactory:
                 exit(1)
             
         self.api_url = "https://api.groq.com/openai/v1/chat/completions"
+
+        # One keep-alive session for Groq and YouTube, so repeated calls skip the
+        # TCP/TLS handshake. Both are POSTs, so urllib3 only retries failed
+        # connections (the paid Groq call is never sent twice); YouTube's 429s
+        # and 5xx responses are retried in search_youtube.
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=20, pool_maxsize=20,
+            max_retries=Retry(total=3, backoff_factor=0.3)
+        ))
+        self.youtube_limiter = RateLimiter(YOUTUBE_SEARCHES_PER_SECOND)
         
         # 3. Database
         self.postgres_url = os.getenv("POSTGRES_URL")
@@ -50,10 +136,10 @@ class DirectCourseFactory:
         }
         
         try:
-            response = requests.post(self.api_url, headers=headers, json=data)
+            response = self.session.post(self.api_url, headers=headers, json=data)
             
             if response.status_code == 200:
-                return response.json()['choices'][0]['message']['content']
+                return orjson.loads(response.content)['choices'][0]['message']['content']
             else:
                 rprint(f"[bold red]API Error {response.status_code}: {response.text}[/bold red]")
                 return None
@@ -62,24 +148,40 @@ class DirectCourseFactory:
             return None
 
     def search_youtube(self, query, limit=3):
-        """Simple YouTube scraper."""
+        """YouTube search via the InnerTube API."""
+        cache_key = f"yt:{limit}:{query}"
+        cached = factory_cache.get(cache_key)
+        if cached:
+            return cached
         try:
-            query_clean = query.replace(' ', '+')
-            url = f"https://www.youtube.com/results?search_query={query_clean}"
-            resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-            html = resp.text
-            video_ids = re.findall(r"watch\?v=(\S{11})", html)
-            
-            seen = set()
-            unique_ids = [x for x in video_ids if not (x in seen or seen.add(x))][:limit]
-            
+            for attempt in range(YOUTUBE_SEARCH_ATTEMPTS):
+                sent_at = self.youtube_limiter.wait()
+                resp = self.session.post(
+                    YOUTUBE_SEARCH_URL,
+                    json=search_body(query),
+                    timeout=10
+                )
+                if resp.status_code == 429:
+                    self.youtube_limiter.slow_down(sent_at)
+                elif resp.status_code >= 500:
+                    time.sleep(0.3 * 2 ** attempt)
+                else:
+                    break
+            resp.raise_for_status()
+            self.youtube_limiter.recover()
+
             results = []
-            for vid in unique_ids:
+            for renderer in iter_video_renderers(orjson.loads(resp.content)):
+                vid = renderer['videoId']
                 results.append({
                     'link': f"https://www.youtube.com/watch?v={vid}",
                     'thumbnail': f"https://img.youtube.com/vi/{vid}/mqdefault.jpg",
-                    'duration': "10:00"
+                    'duration': renderer.get('lengthText', {}).get('simpleText', "10:00")
                 })
+                if len(results) == limit:
+                    break
+            if results:
+                factory_cache.set(cache_key, results)
             return results
         except Exception as e:
             rprint(f"[yellow]⚠ YouTube Search failed: {e}[/yellow]")
@@ -87,33 +189,59 @@ class DirectCourseFactory:
 
     def generate_roadmap(self, topic):
         rprint(f"[cyan]🧠 Asking AI to design '{topic}' course...[/cyan]")
-        prompt = f"""
-        Act as an expert instructor. Create a JSON course roadmap for '{topic}'.
-        Strict JSON format.
-        Structure:
-        {{
-            "title": "{topic} Mastery",
-            "description": "Complete guide from beginner to expert.",
-            "levels": [
-                {{
-                    "level_name": "Beginner",
-                    "topics": [
-                        {{ "title": "Topic Name", "subtopics": ["Subtopic 1", "Subtopic 2"] }}
-                    ]
-                }}
-            ]
-        }}
-        """
+        prompt = ROADMAP_PROMPT.format(topic=topic)
+        cached = factory_cache.get(prompt)
+        if cached:
+            return cached
         json_text = self.call_ai(prompt)
         if not json_text: return None
         
         try:
-            return json.loads(json_text)
+            roadmap = orjson.loads(json_text)
         except:
             rprint("[red]❌ AI returned bad JSON. Try again.[/red]")
             return None
+        try:
+            validate_roadmap(roadmap)
+        except ValueError as e:
+            rprint(f"[red]❌ AI returned a malformed roadmap ({e}). Try again.[/red]")
+            return None
+        factory_cache.set(prompt, roadmap)
+        return roadmap
 
     def upload_to_db(self, course_data):
+        # Look up videos before connecting, so the transaction isn't held open
+        # through the rate-limited searches. Module ids are generated here so
+        # lessons can reference them without a RETURNING round-trip per module.
+        module_rows = []
+        subtopic_rows = []
+        for level in course_data['levels']:
+            rprint(f"  📂 Level: {level['level_name']}")
+            for topic in level['topics']:
+                module_id = str(uuid.uuid4())
+                module_rows.append((module_id, topic['title']))
+                subtopic_rows.extend((module_id, subtopic) for subtopic in topic['subtopics'])
+
+        # A subtopic repeated across topics is searched once, not once per lesson
+        subtopics = list(dict.fromkeys(subtopic for _, subtopic in subtopic_rows))
+        # One progress bar instead of a line per lesson; it redraws at a fixed rate
+        videos_by_subtopic = {}
+        with Progress(SpinnerColumn(), TextColumn("[progress.description]{task.description}"), BarColumn(), MofNCompleteColumn()) as progress, \
+                ThreadPoolExecutor(max_workers=YOUTUBE_SEARCH_WORKERS) as executor:
+            task = progress.add_task("[cyan]Finding lesson videos...", total=len(subtopics))
+            search = lambda s: self.search_youtube(f"{s} {course_data['title']} tutorial", limit=1)
+            for subtopic, videos in zip(subtopics, executor.map(search, subtopics)):
+                videos_by_subtopic[subtopic] = videos
+                progress.advance(task)
+
+        lesson_rows = []
+        for module_id, subtopic in subtopic_rows:
+            videos = videos_by_subtopic[subtopic]
+            if videos:
+                v = videos[0]
+                lesson_rows.append((module_id, subtopic, v['link'], v['duration'], v['thumbnail']))
+        rprint(f"  🎬 Found videos for {len(lesson_rows)}/{len(subtopic_rows)} lessons")
+
         rprint("[cyan]💾 Connecting to Database...[/cyan]")
         try:
             conn = psycopg2.connect(self.postgres_url)
@@ -125,29 +253,15 @@ class DirectCourseFactory:
                 RETURNING id;
             """, (course_data['title'], course_data['description'], "https://placehold.co/600x400/png"))
             course_id = cur.fetchone()[0]
-            
-            total_lessons = 0
-            for level in course_data['levels']:
-                rprint(f"  📂 Level: {level['level_name']}")
-                for topic in level['topics']:
-                    cur.execute("""
-                        INSERT INTO "Module" (id, "courseId", title, "createdAt", "updatedAt")
-                        VALUES (gen_random_uuid(), %s, %s, NOW(), NOW())
-                        RETURNING id;
-                    """, (course_id, topic['title']))
-                    module_id = cur.fetchone()[0]
-                    
-                    for subtopic in topic['subtopics']:
-                        time.sleep(1) 
-                        videos = self.search_youtube(f"{subtopic} {course_data['title']} tutorial", limit=1)
-                        if videos:
-                            v = videos[0]
-                            cur.execute("""
-                                INSERT INTO "Lesson" (id, "moduleId", title, "videoUrl", duration, "thumbnailUrl", "createdAt", "updatedAt")
-                                VALUES (gen_random_uuid(), %s, %s, %s, %s, %s, NOW(), NOW());
-                            """, (module_id, subtopic, v['link'], v['duration'], v['thumbnail']))
-                            total_lessons += 1
-                        rprint(f"    - Added lesson: {subtopic}")
+
+            execute_values(cur, """
+                INSERT INTO "Module" (id, "courseId", title, "createdAt", "updatedAt") VALUES %s
+            """, [(module_id, course_id, title) for module_id, title in module_rows],
+                template="(%s, %s, %s, NOW(), NOW())", page_size=500)
+            execute_values(cur, """
+                INSERT INTO "Lesson" (id, "moduleId", title, "videoUrl", duration, "thumbnailUrl", "createdAt", "updatedAt") VALUES %s
+            """, lesson_rows, template="(gen_random_uuid(), %s, %s, %s, %s, %s, NOW(), NOW())", page_size=500)
+            total_lessons = len(lesson_rows)
 
             conn.commit()
             conn.close()
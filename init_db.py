@@ -56,6 +56,12 @@ try:
         );
     """)
 
+    # 4. Index the foreign keys (Postgres doesn't do it automatically), so
+    # loading a course's modules/lessons and cascading deletes don't seq-scan
+    print("🔨 Indexing foreign keys...")
+    cur.execute('CREATE INDEX IF NOT EXISTS "Module_courseId_idx" ON "Module"("courseId");')
+    cur.execute('CREATE INDEX IF NOT EXISTS "Lesson_moduleId_idx" ON "Lesson"("moduleId");')
+
     conn.commit()
     cur.close()
     conn.close()
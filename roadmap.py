@@ -0,0 +1,22 @@
+"""
+Shape check for the course roadmaps course_factory.py and course_factory_v2.py
+ask an LLM for.
+"""
+
+def validate_roadmap(roadmap):
+    """Raise ValueError unless the roadmap has the levels/topics/subtopics
+    structure upload_to_db walks. The models sometimes answer with valid JSON
+    in the wrong shape; rejecting it here keeps it out of the cache and turns
+    a KeyError mid-upload into a clean error message."""
+    if not isinstance(roadmap, dict) or not isinstance(roadmap.get('title'), str) \
+            or not isinstance(roadmap.get('description'), str) or not isinstance(roadmap.get('levels'), list):
+        raise ValueError("roadmap needs a title, a description and a list of levels")
+    for level in roadmap['levels']:
+        if not isinstance(level, dict) or 'level_name' not in level or not isinstance(level.get('topics'), list):
+            raise ValueError("each level needs a level_name and a list of topics")
+        for topic in level['topics']:
+            if not isinstance(topic, dict) or not isinstance(topic.get('title'), str) \
+                    or not isinstance(topic.get('subtopics'), list) \
+                    or not all(isinstance(s, str) for s in topic['subtopics']):
+                raise ValueError("each topic needs a title and a list of subtopic names")
+    return roadmap
@@ -1,13 +1,9 @@
-from api.index import app, db, Course, Module, Lesson
+from sqlalchemy.exc import IntegrityError
+from api.index import app, db, Course, Module, Lesson, cache_delete, COURSES_CACHE_KEY, ensure_schema
 
 def seed_courses():
     with app.app_context():
-        # Check if Python course exists
-        if Course.query.filter_by(id="python").first():
-            print("Skipping: Python course already exists.")
-            return
-
-        print("Seeding Python Mastery Course...")
+        ensure_schema()
 
         # 1. Create Course
         python_course = Course(
@@ -18,7 +14,16 @@ def seed_courses():
             is_generated=False
         )
         db.session.add(python_course)
-        db.session.flush() # Flush to get the ID if it wasn't manual (here it is manual 'python')
+        try:
+            # The primary key doubles as the existence check, so there is no SELECT
+            # round-trip and two concurrent seeders cannot both insert 'python'.
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            print("Skipping: Python course already exists.")
+            return
+
+        print("Seeding Python Mastery Course...")
 
         # 2. Create Modules & Lessons
         modules_data = [
@@ -49,26 +54,31 @@ def seed_courses():
             }
         ]
 
-        for mod_data in modules_data:
-            module = Module(
+        modules = [
+            Module(
                 course_id=python_course.id,
                 title=mod_data["title"],
                 order_index=mod_data["order"]
             )
-            db.session.add(module)
-            db.session.flush() # Needed to get module.id for lessons
+            for mod_data in modules_data
+        ]
+        db.session.add_all(modules)
+        db.session.flush() # One flush assigns every module.id needed by the lessons
 
-            for i, lesson_data in enumerate(mod_data["lessons"]):
-                lesson = Lesson(
-                    module_id=module.id,
-                    title=lesson_data["title"],
-                    video_url=lesson_data["video_id"],
-                    duration=lesson_data["duration"],
-                    order_index=i + 1
-                )
-                db.session.add(lesson)
+        db.session.add_all([
+            Lesson(
+                module_id=module.id,
+                title=lesson_data["title"],
+                video_url=lesson_data["video_id"],
+                duration=lesson_data["duration"],
+                order_index=i + 1
+            )
+            for module, mod_data in zip(modules, modules_data)
+            for i, lesson_data in enumerate(mod_data["lessons"])
+        ])
 
         db.session.commit()
+        cache_delete(COURSES_CACHE_KEY)
         print("✅ Python Mastery Course Seeded Successfully!")
 
 if __name__ == "__main__":
@@ -0,0 +1,26 @@
+"""
+Disk cache shared by course_factory.py and course_factory_v2.py.
+
+Values are stored under the SHA-256 of a string key (usually the prompt), so
+re-running a generator skips the LLM calls and searches it has already made.
+Callers only store successful results (parsed roadmaps, non-empty searches),
+so a bad answer is retried on the next run instead of being replayed.
+"""
+import hashlib
+import shelve
+import threading
+
+class ShelveCache:
+    """A shelve file behind a lock, since shelve doesn't support concurrent access."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock, shelve.open(self.path) as cache:
+            return cache.get(hashlib.sha256(key.encode()).hexdigest())
+
+    def set(self, key: str, value):
+        with self.lock, shelve.open(self.path) as cache:
+            cache[hashlib.sha256(key.encode()).hexdigest()] = value
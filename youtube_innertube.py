@@ -0,0 +1,28 @@
+"""
+YouTube InnerTube search helpers shared by course_factory.py and course_factory_v2.py.
+
+The search endpoint returns structured JSON in one request, so there is no HTML
+scraping or third-party search wrapper involved. YouTube eventually rejects old
+web client versions; when searches start failing, bump CLIENT_VERSION here (and
+in api/index.py, which is bundled on its own as the Vercel function).
+"""
+
+YOUTUBE_SEARCH_URL = "https://www.youtube.com/youtubei/v1/search?prettyPrint=false"
+CLIENT_VERSION = "2.20240101.00.00"
+YOUTUBE_CLIENT_CONTEXT = {"client": {"clientName": "WEB", "clientVersion": CLIENT_VERSION, "hl": "en"}}
+
+def search_body(query):
+    """JSON body for a search request."""
+    return {"context": YOUTUBE_CLIENT_CONTEXT, "query": query}
+
+def iter_video_renderers(node):
+    """Yield every videoRenderer in an InnerTube response, wherever it is nested."""
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == 'videoRenderer':
+                yield value
+            else:
+                yield from iter_video_renderers(value)
+    elif isinstance(node, list):
+        for item in node:
+            yield from iter_video_renderers(item)